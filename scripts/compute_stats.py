@@ -4,9 +4,19 @@ Compute statistics for PFM-DenseBench website
 - Average rank for each model across all datasets and methods
 """
 
+import argparse
 import json
 import os
+import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib parser
+    orjson = None
 
 # Configuration
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Data')
@@ -71,178 +81,223 @@ DATASET_CATEGORIES = {
     'Gland': ['GlaS', 'CRAG', 'RINGS'],
     'Tissue': ['BCSS', 'CoCaHis', 'COSAS24', 'EBHI', 'WSSS4LUAD', 'Janowczyk']
 }
+DATASET_TO_CATEGORY = {d: cat for cat, ds in DATASET_CATEGORIES.items() for d in ds}
+
+# Field accessors for the flat (method, dataset, model, mean, ci_lower, ci_upper) entries
+MODEL_OF = itemgetter(2)
+SCORE_OF = itemgetter(3)
+
+
+def read_bytes(filepath):
+    """Read a file as raw bytes"""
+    with open(filepath, 'rb') as f:
+        return f.read()
 
 
 def load_all_data():
-    """Load all JSON data files"""
+    """Load all JSON data files (reads run in parallel, parsed with orjson if available)"""
+    paths = [os.path.join(DATA_DIR, f'{method}.json') for method in METHODS]
+    with ThreadPoolExecutor(max_workers=len(METHODS)) as executor:
+        blobs = list(executor.map(read_bytes, paths))
+
+    loads = orjson.loads if orjson is not None else json.loads
     all_data = {}
-    for method in METHODS:
-        filepath = os.path.join(DATA_DIR, f'{method}.json')
-        with open(filepath, 'r') as f:
-            all_data[method] = json.load(f)
+    for method, blob in zip(METHODS, blobs):
+        all_data[method] = loads(blob)
     return all_data
 
 
-def get_model_display_name(model_key):
-    """Get display name for model"""
-    return MODEL_DISPLAY_NAMES.get(model_key, model_key)
+def write_json(filepath, obj, pretty=False):
+    """Write obj as compact JSON, or indented if pretty (encoded with orjson if available)"""
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else None)
+    elif pretty:
+        data = json.dumps(obj, indent=2).encode('utf-8')
+    else:
+        data = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    with open(filepath, 'wb') as f:
+        f.write(data)
 
 
-def get_dataset_display_name(dataset_key):
-    """Get display name for dataset"""
-    return DATASET_DISPLAY_NAMES.get(dataset_key, dataset_key)
+def flatten_entries(all_data):
+    """
+    Walk all_data once and extract the Mean_Dice of every experiment
+    Returns: [(method, dataset, model, mean, ci_lower, ci_upper), ...]
+    Entries of the same (method, dataset) are contiguous, and dataset/model
+    names are interned so names repeated across files share one str.
+    """
+    intern = sys.intern
+    entries = []
+    add_entry = entries.append
+    for method, method_data in all_data.items():
+        for dataset, models in method_data.items():
+            dataset = intern(dataset)
+            for model, metrics in models.items():
+                mean_dice = metrics.get('Mean_Dice')
+                if mean_dice is not None:
+                    add_entry((method, dataset, intern(model),
+                               mean_dice['mean'], mean_dice['ci_lower'], mean_dice['ci_upper']))
+    return entries
 
 
-def compute_dataset_sota(all_data):
+def build_display_names(entries):
     """
-    Compute SOTA mDice for each dataset
-    Returns: {dataset: {mDice, model, method, ci_lower, ci_upper}}
+    Resolve display names once for every key present in the flat entries
+    Returns: {'model': {...}, 'dataset': {...}, 'method': {...}}
     """
-    dataset_sota = {}
-    
-    # Get all datasets from any method
-    all_datasets = set()
-    for method_data in all_data.values():
-        all_datasets.update(method_data.keys())
-    
-    for dataset in all_datasets:
-        best_score = -1
-        best_model = None
-        best_method = None
-        best_ci_lower = None
-        best_ci_upper = None
-        
-        for method, method_data in all_data.items():
-            if dataset not in method_data:
-                continue
-            
-            for model, metrics in method_data[dataset].items():
-                if 'Mean_Dice' in metrics:
-                    score = metrics['Mean_Dice']['mean']
-                    if score > best_score:
-                        best_score = score
-                        best_model = model
-                        best_method = method
-                        best_ci_lower = metrics['Mean_Dice']['ci_lower']
-                        best_ci_upper = metrics['Mean_Dice']['ci_upper']
-        
-        if best_model:
-            dataset_sota[dataset] = {
-                'mDice': best_score,
-                'mDice_display': f"{best_score:.4f}",
-                'ci_lower': best_ci_lower,
-                'ci_upper': best_ci_upper,
-                'model': get_model_display_name(best_model),
-                'model_key': best_model,
-                'method': METHOD_DISPLAY_NAMES.get(best_method, best_method),
-                'method_key': best_method,
-                'dataset_display': get_dataset_display_name(dataset),
-                'category': next((cat for cat, datasets in DATASET_CATEGORIES.items() if dataset in datasets), 'Other')
-            }
-    
-    return dataset_sota
+    methods = set(map(itemgetter(0), entries))
+    datasets = set(map(itemgetter(1), entries))
+    models = set(map(itemgetter(2), entries))
+    return {
+        'model': {m: MODEL_DISPLAY_NAMES.get(m, m) for m in models},
+        'dataset': {d: DATASET_DISPLAY_NAMES.get(d, d) for d in datasets},
+        'method': {m: METHOD_DISPLAY_NAMES.get(m, m) for m in methods},
+    }
+
+
+def sort_by_field(results, field):
+    """Return a {key: record} dict ordered by record[field], highest first"""
+    return dict(sorted(results.items(), key=lambda item: item[1][field], reverse=True))
 
 
-def compute_model_ranks(all_data):
+def rank_group(models, scores, rank_sum, rank_count):
     """
-    Compute average rank for each model across all datasets and methods
-    Returns: {model: {avg_rank, total_comparisons, ranks_detail}}
+    Rank one (method, dataset) group by score and add each model's rank
+    into rank_sum / rank_count (higher score is better, ties keep file order)
     """
-    # Collect all (dataset, method) scores for each model
-    model_ranks = defaultdict(list)
-    
-    # Get all datasets
-    all_datasets = set()
-    for method_data in all_data.values():
-        all_datasets.update(method_data.keys())
+    order = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+    for rank, model in enumerate(map(models.__getitem__, order), 1):
+        rank_sum[model] += rank
+        rank_count[model] += 1
+
+
+def compute_all_numeric(entries):
+    """
+    Compute dataset SOTA, model ranks and method comparison in a single pass
+    over the flat entries from flatten_entries
+    Returns numeric results only (no display strings):
+    (dataset_sota, model_ranks, method_comparison), each ordered best first
+    """
+    dataset_best = {}
+    rank_sum = defaultdict(int)
+    rank_count = defaultdict(int)
+    method_sum = defaultdict(float)
+    method_count = defaultdict(int)
     
-    for dataset in all_datasets:
-        for method, method_data in all_data.items():
-            if dataset not in method_data:
-                continue
-            
-            # Get all model scores for this dataset-method combination
-            model_scores = []
-            for model, metrics in method_data[dataset].items():
-                if 'Mean_Dice' in metrics:
-                    score = metrics['Mean_Dice']['mean']
-                    model_scores.append((model, score))
-            
-            # Sort by score descending (higher is better)
-            model_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            # Assign ranks
-            for rank, (model, score) in enumerate(model_scores, 1):
-                model_ranks[model].append({
-                    'dataset': dataset,
-                    'method': method,
-                    'rank': rank,
-                    'score': score,
-                    'total_models': len(model_scores)
-                })
+    for (method, dataset), group in groupby(entries, key=itemgetter(0, 1)):
+        # Get all model scores for this dataset-method combination
+        group = list(group)
+        group_models = list(map(MODEL_OF, group))
+        group_scores = list(map(SCORE_OF, group))
+        
+        # Keep the first best entry per dataset (max() returns the first maximum)
+        top = max(group, key=SCORE_OF)
+        best = dataset_best.setdefault(dataset, top)
+        if top[3] > best[3]:
+            dataset_best[dataset] = top
+        
+        method_sum[method] = sum(group_scores, method_sum[method])
+        method_count[method] += len(group_scores)
+        
+        rank_group(group_models, group_scores, rank_sum, rank_count)
     
-    # Compute average rank for each model
-    model_avg_ranks = {}
-    for model, ranks_list in model_ranks.items():
-        avg_rank = sum(r['rank'] for r in ranks_list) / len(ranks_list)
-        model_avg_ranks[model] = {
-            'avg_rank': avg_rank,
-            'avg_rank_display': f"{avg_rank:.2f}",
-            'total_comparisons': len(ranks_list),
-            'model_display': get_model_display_name(model),
-            'model_key': model
+    # SOTA mDice for each dataset
+    dataset_sota = {}
+    for dataset, (best_method, _, best_model, best_score, best_ci_lower, best_ci_upper) in dataset_best.items():
+        dataset_sota[dataset] = {
+            'mDice': best_score,
+            'ci_lower': best_ci_lower,
+            'ci_upper': best_ci_upper,
+            'model_key': best_model,
+            'method_key': best_method,
+            'category': DATASET_TO_CATEGORY.get(dataset, 'Other')
         }
     
-    # Sort by average rank (ascending - lower is better)
-    sorted_models = sorted(model_avg_ranks.items(), key=lambda x: x[1]['avg_rank'])
+    # Average rank for each model as (avg_rank, total_comparisons, model) records,
+    # sorted ascending (lower is better)
+    rank_records = [(rank_sum[model] / count, count, model) for model, count in rank_count.items()]
+    rank_records.sort(key=itemgetter(0))
+    model_avg_ranks = [
+        {'avg_rank': avg_rank, 'total_comparisons': count, 'model_key': model, 'position': pos}
+        for pos, (avg_rank, count, model) in enumerate(rank_records, 1)
+    ]
     
-    # Add position
-    result = []
-    for pos, (model, data) in enumerate(sorted_models, 1):
-        data['position'] = pos
-        result.append(data)
+    # Average performance for each method
+    method_comparison = {}
+    for method, count in method_count.items():
+        method_comparison[method] = {
+            'avg_mDice': method_sum[method] / count,
+            'num_experiments': count
+        }
     
+    return (sort_by_field(dataset_sota, 'mDice'), model_avg_ranks,
+            sort_by_field(method_comparison, 'avg_mDice'))
+
+
+def format_dataset_sota(dataset_sota, display_names):
+    """Add display strings and names to numeric dataset SOTA results"""
+    result = {}
+    for dataset, info in dataset_sota.items():
+        result[dataset] = {
+            'mDice': info['mDice'],
+            'mDice_display': f"{info['mDice']:.4f}",
+            'ci_lower': info['ci_lower'],
+            'ci_upper': info['ci_upper'],
+            'model': display_names['model'][info['model_key']],
+            'model_key': info['model_key'],
+            'method': display_names['method'][info['method_key']],
+            'method_key': info['method_key'],
+            'dataset_display': display_names['dataset'][dataset],
+            'category': info['category']
+        }
     return result
 
 
-def compute_method_comparison(all_data):
-    """
-    Compute average performance for each method
-    """
-    method_scores = defaultdict(list)
-    
-    for method, method_data in all_data.items():
-        for dataset, models in method_data.items():
-            for model, metrics in models.items():
-                if 'Mean_Dice' in metrics:
-                    method_scores[method].append(metrics['Mean_Dice']['mean'])
-    
+def format_model_ranks(model_ranks, display_names):
+    """Add display strings and names to numeric model rank results"""
+    result = []
+    for data in model_ranks:
+        result.append({
+            'avg_rank': data['avg_rank'],
+            'avg_rank_display': f"{data['avg_rank']:.2f}",
+            'total_comparisons': data['total_comparisons'],
+            'model_display': display_names['model'][data['model_key']],
+            'model_key': data['model_key'],
+            'position': data['position']
+        })
+    return result
+
+
+def format_method_comparison(method_comparison, display_names):
+    """Add display strings and names to numeric method comparison results"""
     result = {}
-    for method, scores in method_scores.items():
-        avg_score = sum(scores) / len(scores)
+    for method, info in method_comparison.items():
         result[method] = {
-            'avg_mDice': avg_score,
-            'avg_mDice_display': f"{avg_score:.4f}",
-            'method_display': METHOD_DISPLAY_NAMES.get(method, method),
-            'num_experiments': len(scores)
+            'avg_mDice': info['avg_mDice'],
+            'avg_mDice_display': f"{info['avg_mDice']:.4f}",
+            'method_display': display_names['method'][method],
+            'num_experiments': info['num_experiments']
         }
-    
     return result
 
 
 def main():
     """Main function to compute and save all statistics"""
+    parser = argparse.ArgumentParser(description='Compute statistics for PFM-DenseBench website')
+    parser.add_argument('--pretty', action='store_true',
+                        help='write stats.json indented for human reading (default: compact)')
+    args = parser.parse_args()
+    
     print("Loading data...")
     all_data = load_all_data()
+    entries = flatten_entries(all_data)
+    display_names = build_display_names(entries)
     
-    print("Computing dataset SOTA...")
-    dataset_sota = compute_dataset_sota(all_data)
-    
-    print("Computing model ranks...")
-    model_ranks = compute_model_ranks(all_data)
-    
-    print("Computing method comparison...")
-    method_comparison = compute_method_comparison(all_data)
+    print("Computing dataset SOTA, model ranks and method comparison...")
+    dataset_sota, model_ranks, method_comparison = compute_all_numeric(entries)
+    dataset_sota = format_dataset_sota(dataset_sota, display_names)
+    model_ranks = format_model_ranks(model_ranks, display_names)
+    method_comparison = format_method_comparison(method_comparison, display_names)
     
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -255,8 +310,7 @@ def main():
     }
     
     output_path = os.path.join(OUTPUT_DIR, 'stats.json')
-    with open(output_path, 'w') as f:
-        json.dump(output, f, indent=2)
+    write_json(output_path, output, pretty=args.pretty)
     
     print(f"Results saved to {output_path}")
     
@@ -264,7 +318,7 @@ def main():
     print("\n" + "="*60)
     print("DATASET SOTA (mDice)")
     print("="*60)
-    for dataset, info in sorted(dataset_sota.items(), key=lambda x: x[1]['mDice'], reverse=True):
+    for dataset, info in dataset_sota.items():
         print(f"{info['dataset_display']:15} | {info['mDice']:.4f} | {info['model']:15} | {info['method']}")
     
     print("\n" + "="*60)
@@ -276,7 +330,7 @@ def main():
     print("\n" + "="*60)
     print("METHOD COMPARISON (Average mDice)")
     print("="*60)
-    for method, info in sorted(method_comparison.items(), key=lambda x: x[1]['avg_mDice'], reverse=True):
+    for method, info in method_comparison.items():
         print(f"{info['method_display']:15} | Avg mDice: {info['avg_mDice']:.4f} | Experiments: {info['num_experiments']}")
 
 